@@ -0,0 +1,27 @@
+"""Build script for the ahead-of-time compiled NPV and IRR kernels.
+
+Compiles the jitted kernels of calc.investment into the npv_kernels extension
+module next to this file, which calc.investment imports when present so
+workers don't pay for JIT compilation. Run from the project root with
+
+	python -m calc._npv_aot
+
+"""
+import os
+
+from numba.pycc import CC
+
+from calc.investment import _npv, _irr_newton, _irr_newton_batch
+
+
+cc = CC('npv_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Exports the pure Python kernels, so they are only written once
+cc.export('npv', 'f8(f8[:], f8)')(_npv.py_func)
+cc.export('irr_newton', 'f8(f8[:], f8)')(_irr_newton.py_func)
+cc.export('irr_newton_batch', 'f8[:](f8[:, :], i8[:], f8)')(_irr_newton_batch.py_func)
+
+
+if __name__ == '__main__':
+	cc.compile()
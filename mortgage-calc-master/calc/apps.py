@@ -3,3 +3,20 @@ from django.apps import AppConfig
 
 class CalcConfig(AppConfig):
     name = 'calc'
+
+    def ready(self):
+        # Compiles the jitted IRR functions at startup so the first request
+        # doesn't pay for the compilation
+        import numpy
+        from calc.investment import _npv, _dnpv, _irr_newton, _irr_newton_batch, npv_kernels
+
+        # Nothing to compile when the ahead-of-time compiled kernels are built
+        if npv_kernels is not None:
+            return
+
+        cash_stream = numpy.full(31, 1000.0)
+        cash_stream[0] = -30000.0
+        _npv(cash_stream, 0.1)
+        _dnpv(cash_stream, 0.1)
+        _irr_newton(cash_stream, 0.1)
+        _irr_newton_batch(numpy.tril(numpy.tile(cash_stream, (30, 1)), 1), numpy.arange(2, 32), 0.1)
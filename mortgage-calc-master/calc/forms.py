@@ -1,32 +1,52 @@
 from django import forms
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
-from decimal import Decimal
+
+# Limits shared by InvestmentForm and parse_investment_data
+PERCENT_MIN = 0
+PERCENT_MAX = 100
+ALTERNATIVE_RENT_MIN = 0
+
+# Fields entered as percentages, which are cleaned to rates
+PERCENT_FIELDS = (
+	'closing_cost',
+	'maintenance_cost',
+	'property_tax',
+	'down_payment',
+	'interest_rate',
+	'yearly_appreciation',
+	'realtor_cost',
+	'state_tax_bracket',
+	'insurance',
+)
+
+FEDERAL_TAX_RATE = (
+	('.1', ('10% - Income $9,525/$19,050 Single/Married')),
+	('.12', ('12% - Income $38,700/$77,400 Single/Married')),
+	('.22', ('22% - Income $82,500/$165,000 Single/Married')),
+	('.24', ('24% - Income $157,500/$315,000 Single/Married')),
+	('.32', ('32% - Income $200,000/$400,000 Single/Married')),
+	('.35', ('35% - Income $500,000/$600,000 Single/Married')),
+	('.37', ('37% - Income $500,000+/$600,000+ Single/Married')),
+)
+
+# Federal tax bracket choices mapped to their cleaned rates
+FEDERAL_TAX_RATE_VALUES = {choice: float(choice) for choice, _ in FEDERAL_TAX_RATE}
 
 class InvestmentForm(forms.Form):
 	
-	FEDERAL_TAX_RATE = (
-		('.1', ('10% - Income $9,525/$19,050 Single/Married')),
-		('.12', ('12% - Income $38,700/$77,400 Single/Married')),
-		('.22', ('22% - Income $82,500/$165,000 Single/Married')),
-		('.24', ('24% - Income $157,500/$315,000 Single/Married')),
-		('.32', ('32% - Income $200,000/$400,000 Single/Married')),
-		('.35', ('35% - Income $500,000/$600,000 Single/Married')),
-		('.37', ('37% - Income $500,000+/$600,000+ Single/Married')),
-	)
-	
 	price = forms.IntegerField()
-	closing_cost = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
-	maintenance_cost = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
-	property_tax = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
-	down_payment = forms.DecimalField(max_value=100, min_value=0, max_digits=5, decimal_places=2)
-	interest_rate = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
-	yearly_appreciation = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
-	alternative_rent = forms.IntegerField(min_value=0)
-	realtor_cost = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
+	closing_cost = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
+	maintenance_cost = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
+	property_tax = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
+	down_payment = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=5, decimal_places=2)
+	interest_rate = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
+	yearly_appreciation = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
+	alternative_rent = forms.IntegerField(min_value=ALTERNATIVE_RENT_MIN)
+	realtor_cost = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
 	federal_tax_bracket = forms.ChoiceField(choices=FEDERAL_TAX_RATE, initial=.24)
-	state_tax_bracket = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
-	insurance = forms.DecimalField(max_value=100, min_value=0, max_digits=4, decimal_places=2)
+	state_tax_bracket = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
+	insurance = forms.DecimalField(max_value=PERCENT_MAX, min_value=PERCENT_MIN, max_digits=4, decimal_places=2)
 
 	def clean_closing_cost(self):
 		data = self.cleaned_data['closing_cost']
@@ -58,7 +78,7 @@ class InvestmentForm(forms.Form):
 	
 	def clean_federal_tax_bracket(self):
 		data = self.cleaned_data['federal_tax_bracket']
-		return Decimal(data)
+		return FEDERAL_TAX_RATE_VALUES[data]
 	
 	def clean_state_tax_bracket(self):
 		data = self.cleaned_data['state_tax_bracket']
@@ -66,4 +86,65 @@ class InvestmentForm(forms.Form):
 	
 	def clean_insurance(self):
 		data = self.cleaned_data['insurance']
-		return data / 100
\ No newline at end of file
+		return data / 100
+
+
+def parse_investment_data(data):
+	"""Return cleaned investment values parsed from GET params, and any errors.
+	
+	Lighter weight than InvestmentForm for the JSON endpoint, casting each 
+	value directly and checking it against the same limits.
+	
+	Args:
+		data (QueryDict): GET params of the request.
+		
+	Returns:
+		tuple (dict, dict): Cleaned values keyed by field, with percentages
+			converted to float rates, and lists of error messages keyed by field
+			like form.errors, which is empty if the data is valid.
+	
+	"""
+	
+	cleaned_data = {}
+	errors = {}
+	
+	def get_value(field):
+		value = data.get(field, '').strip()
+		if not value:
+			errors[field] = ['This field is required.']
+		return value
+	
+	for field, min_value in (('price', None), ('alternative_rent', ALTERNATIVE_RENT_MIN)):
+		value = get_value(field)
+		if not value:
+			continue
+		try:
+			cleaned_data[field] = int(value)
+		except ValueError:
+			errors[field] = ['Enter a whole number.']
+			continue
+		if min_value is not None and cleaned_data[field] < min_value:
+			errors[field] = ['Ensure this value is greater than or equal to %s.' % min_value]
+	
+	for field in PERCENT_FIELDS:
+		value = get_value(field)
+		if not value:
+			continue
+		try:
+			percent = float(value)
+		except ValueError:
+			errors[field] = ['Enter a number.']
+			continue
+		if not PERCENT_MIN <= percent <= PERCENT_MAX:
+			errors[field] = ['Ensure this value is between %s and %s.' % (PERCENT_MIN, PERCENT_MAX)]
+			continue
+		cleaned_data[field] = percent / 100
+	
+	value = get_value('federal_tax_bracket')
+	if value:
+		if value in FEDERAL_TAX_RATE_VALUES:
+			cleaned_data['federal_tax_bracket'] = FEDERAL_TAX_RATE_VALUES[value]
+		else:
+			errors['federal_tax_bracket'] = ['Select a valid choice. %s is not one of the available choices.' % value]
+	
+	return cleaned_data, errors
@@ -1,17 +1,14 @@
-from decimal import Decimal
-import math
-
 class House:
 	"""Respresentation of the investment's asset.
 
 	Attributes:
 		price (int): Asset purchase price in dollars, no cents.
-		yearly_appreciation_rate (Decimal): Yearly value growth rate of the asset.
-		yearly_property_tax_rate (Decimal): Yearly property tax rate as a % of
+		yearly_appreciation_rate (float): Yearly value growth rate of the asset.
+		yearly_property_tax_rate (float): Yearly property tax rate as a % of
 			the asset value.
-		yearly_maintenance_rate (Decimal): Yearly cost of maintenance
+		yearly_maintenance_rate (float): Yearly cost of maintenance
 			as a % of the asset value.
-		yearly_insurance_rate (Decimal): Yearly cost of insurance as
+		yearly_insurance_rate (float): Yearly cost of insurance as
 			a % of the asset value.
 
 	"""
@@ -27,12 +24,13 @@ class House:
 		"""Return future value of the asset given number of years after purchase.
 
 		Args:
-			year (int): Number of years after the purchase of the asset.
+			year (int/ndarray): Number of years after the purchase of the asset,
+				or an array of them to get the whole value schedule at once.
 
 		Returns:
-			Decimal: Future value of the asset.
+			float/ndarray: Future value of the asset.
 
 		"""
 		growth_rate = self.yearly_appreciation_rate
 
-		return Decimal(self.price * ((1 + growth_rate) ** year))
+		return self.price * (1 + growth_rate) ** year
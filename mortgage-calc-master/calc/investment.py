@@ -1,21 +1,211 @@
-import numpy_financial as npf
-import math
-from decimal import Decimal
+import numba
+import numpy
+from scipy import optimize
 from django.conf import settings
 
+try:
+	# Ahead-of-time compiled kernels, built by calc/_npv_aot.py
+	from calc import npv_kernels
+except ImportError:
+	npv_kernels = None
+
+
+@numba.njit(cache=True, fastmath=True, nogil=True)
+def _npv(cash_stream, rate):
+	"""Return net present value of a yearly cash stream at a given rate."""
+	# Horner's rule in the discount factor, avoiding a power per year
+	discount = 1.0 / (1.0 + rate)
+	npv = 0.0
+	for year in range(cash_stream.shape[0] - 1, -1, -1):
+		npv = npv * discount + cash_stream[year]
+
+	return npv
+
+
+@numba.njit(cache=True, fastmath=True, nogil=True)
+def _dnpv(cash_stream, rate):
+	"""Return derivative of the net present value with respect to the rate."""
+	discount = 1.0 / (1.0 + rate)
+	dnpv = 0.0
+	for year in range(cash_stream.shape[0] - 1, 0, -1):
+		dnpv = dnpv * discount - year * cash_stream[year]
+
+	return dnpv * discount * discount
+
+
+@numba.njit(cache=True, nogil=True)
+def _newton(cash_stream, guess, compounded):
+	"""Return root of the NPV using Newton-Raphson, or nan if not found.
+
+	When compounded, steps along the NPV compounded to the final year instead,
+	which shares its roots but is concave for streams of early outflows and
+	so cannot overshoot towards -100% like the NPV itself does.
+
+	"""
+	years = cash_stream.shape[0] - 1
+	rate = guess
+	for _ in range(100):
+		npv = _npv(cash_stream, rate)
+		slope = _dnpv(cash_stream, rate)
+		if compounded:
+			slope += years * npv / (1.0 + rate)
+		if slope == 0.0:
+			return numpy.nan
+
+		next_rate = rate - npv / slope
+
+		# Rates at or below -100% mean the iteration has diverged
+		if next_rate <= -1.0 or not numpy.isfinite(next_rate):
+			return numpy.nan
+
+		if abs(next_rate - rate) < 1e-10:
+			return next_rate
+
+		rate = next_rate
+
+	return numpy.nan
+
+
+@numba.njit(cache=True, nogil=True)
+def _irr_newton(cash_stream, guess=0.1):
+	"""Return IRR of a yearly cash stream using Newton-Raphson.
+
+	Args:
+		cash_stream (ndarray): Contiguous float64 array of yearly cash flows.
+		guess (float): Starting rate for the iteration.
+
+	Returns:
+		float: IRR as a decimal rate, or nan if there is none.
+
+	"""
+	irr = _newton(cash_stream, guess, True)
+
+	# Streams with large early inflows, e.g. from a small down payment,
+	# converge on the NPV itself instead
+	if numpy.isnan(irr):
+		irr = _newton(cash_stream, guess, False)
+
+	return irr
+
+
+@numba.njit(cache=True, nogil=True)
+def _irr_newton_batch(cash_streams, lengths, guess=0.1):
+	"""Return IRRs of zero padded yearly cash streams using Newton-Raphson.
+
+	Args:
+		cash_streams (ndarray): 2D float64 array with a yearly cash stream per
+			row, padded with trailing zeros.
+		lengths (ndarray): int64 array of the number of cash flows in each row.
+		guess (float): Starting rate for the iteration.
+
+	Returns:
+		ndarray: IRR of each row as a decimal rate, or nan if none was found.
+
+	"""
+	irrs = numpy.empty(cash_streams.shape[0])
+
+	# Padding leaves the NPV unchanged but not the compounded Newton step,
+	# so each row is solved without it
+	for row in range(cash_streams.shape[0]):
+		irrs[row] = _irr_newton(cash_streams[row, :lengths[row]], guess)
+
+	return irrs
+
+
+# Uses the ahead-of-time compiled kernels when built, which need no warm up,
+# and falls back to the jitted ones otherwise
+if npv_kernels is not None:
+	_npv_kernel, _irr_newton_kernel, _irr_newton_batch_kernel = \
+		npv_kernels.npv, npv_kernels.irr_newton, npv_kernels.irr_newton_batch
+else:
+	_npv_kernel, _irr_newton_kernel, _irr_newton_batch_kernel = \
+		_npv, _irr_newton, _irr_newton_batch
+
+
+def _get_irr_rate(cash_stream):
+	"""Return IRR of a yearly cash stream, or nan if there is none.
+
+	Tries Newton-Raphson first, then Brent's method for the streams it
+	diverges on, which always converges once the IRR is bracketed.
+
+	Args:
+		cash_stream (ndarray): Contiguous float64 array of yearly cash flows.
+
+	Returns:
+		float: IRR as a decimal rate, or nan if there is none.
+
+	"""
+	irr = _irr_newton_kernel(cash_stream, 0.1)
+	if not numpy.isnan(irr):
+		return irr
+
+	return _get_irr_rate_brent(cash_stream)
+
+
+def _get_irr_rates(cash_streams, lengths):
+	"""Return IRRs of zero padded yearly cash streams, or nan where there are none.
+
+	Solves all streams with Newton-Raphson in a single call, then retries the
+	streams it diverges on with Brent's method.
+
+	Args:
+		cash_streams (ndarray): 2D float64 array with a yearly cash stream per
+			row, padded with trailing zeros.
+		lengths (ndarray): int64 array of the number of cash flows in each row.
+
+	Returns:
+		ndarray: IRR of each row as a decimal rate, or nan if there is none.
+
+	"""
+	irrs = _irr_newton_batch_kernel(cash_streams, lengths, 0.1)
+	for row in numpy.flatnonzero(numpy.isnan(irrs)):
+		irrs[row] = _get_irr_rate_brent(cash_streams[row, :lengths[row]])
+
+	return irrs
+
+
+def _get_irr_rate_brent(cash_stream):
+	# Widens the bracket upwards for very profitable streams, up to 10,000%
+	lower_rate, upper_rate = -0.99, 1.0
+	lower_npv = _npv_kernel(cash_stream, lower_rate)
+	while lower_npv * _npv_kernel(cash_stream, upper_rate) > 0:
+		if upper_rate >= 100:
+			return numpy.nan
+		upper_rate *= 10
+
+	return optimize.brentq(lambda rate: _npv_kernel(cash_stream, rate), lower_rate, upper_rate, xtol=1e-10)
+
+
+def get_yearly_irr_rates(investments):
+	"""Return IRRs for years 1-30 of each investment, solved in a single batch.
+
+	Args:
+		investments (list): Investment objects with mortgages of the same term.
+
+	Returns:
+		list (ndarray): IRRs of each investment as decimal rates, or nan for
+			years without one.
+
+	"""
+	cash_streams, lengths = zip(*(investment.get_irr_cash_streams() for investment in investments))
+	irr_rates = _get_irr_rates(numpy.concatenate(cash_streams), numpy.concatenate(lengths))
+
+	return numpy.split(irr_rates, len(investments))
+
+
 class Investment:
 	"""Respresentation of the Investment.
 
 	Attributes:
 		house (House): House object for the investment.
 		mortgage (Mortgage): Mortgage object for the investment.
-		closing_cost_rate (Decimal): Buyer's closing costs as a % of the house price.
+		closing_cost_rate (float): Buyer's closing costs as a % of the house price.
 		alternative_rent (int): Alternative rent buyer would be paying if they did
 			not buy the house.
-		realtor_cost_rate (Decimal): Seller's costs of paying the buyer and seller
+		realtor_cost_rate (float): Seller's costs of paying the buyer and seller
 			agents as a % of the house price.
-		federal_tax_rate (Decimal): Top marginal federal tax rate paid by the buyer.
-		state_tax_rate (Decimal): Top marginal state tax rate paid by the buyer.
+		federal_tax_rate (float): Top marginal federal tax rate paid by the buyer.
+		state_tax_rate (float): Top marginal state tax rate paid by the buyer.
 
 	"""
 
@@ -28,6 +218,7 @@ class Investment:
 		self.realtor_cost_rate = realtor_cost_rate
 		self.federal_tax_rate = federal_tax_rate
 		self.state_tax_rate = state_tax_rate
+		self._yearly_schedules = None
 
 	# Returns total cash costs for purchase
 	def _get_year_zero_cash_flow(self):
@@ -46,10 +237,7 @@ class Investment:
 
 		# Mortgage tax deduction only applies to first $750K of the
 		# loan balance
-		if debt_value * -1 > debt_limit:
-			interest_multiplier = (debt_limit / debt_value) * -1
-		else:
-			interest_multiplier = 1
+		interest_multiplier = debt_limit / numpy.maximum(debt_value * -1, debt_limit)
 
 		total_tax_rate = self.federal_tax_rate + self.state_tax_rate
 
@@ -61,10 +249,7 @@ class Investment:
 		salt_limit = settings.SALT_LIMIT
 
 		# SALT maxes out at $10K
-		if property_tax * -1 > salt_limit:
-			property_tax_writeoff = salt_limit * self.federal_tax_rate
-		else:
-			property_tax_writeoff = property_tax * self.federal_tax_rate * -1
+		property_tax_writeoff = numpy.minimum(property_tax * -1, salt_limit) * self.federal_tax_rate
 
 		return property_tax_writeoff
 
@@ -72,16 +257,24 @@ class Investment:
 	def _get_future_rent(self, year):
 		growth_rate = self.house.yearly_appreciation_rate
 
-		return Decimal(self.alternative_rent * ((1 + growth_rate) ** year))
+		return self.alternative_rent * (1 + growth_rate) ** year
 
 	@staticmethod
 	def _convert_to_round_integer(number):
 		round_integer = int(round(number))
 		return round_integer
 
-	def get_yearly_cash_flows_and_irr(self):
+	@staticmethod
+	def _convert_to_round_integers(numbers):
+		return numpy.rint(numbers).astype(int).tolist()
+
+	def get_yearly_cash_flows_and_irr(self, irr_rates=None):
 		"""Return array of cash flow dicts and IRRs.
 
+		Args:
+			irr_rates (ndarray): IRRs for years 1-30 from get_yearly_irr_rates,
+				if already solved in a batch with other investments.
+
 		Returns:
 			dict (string:any): Dictionary representing each year of the investment
 				year (string/int): 'Purchase' for year 0 and
@@ -95,20 +288,23 @@ class Investment:
 				other_costs (int): Cost of maintenance, insurance, and pmi,
 					net of the tax shield
 				saved_rent (int): Rent not paid in year.
-				irr (string/Decimal): 'NA' for year 0- and IRR as Decimal
+				irr (string/float): 'NA' for year 0- and IRR as float
 					for each of years 1-30
-			array (string/Decimal): 'NA' for year 0 and IRR as Decimal for each of
+			array (string/float): 'NA' for year 0 and IRR as float for each of
 				years 1-30
 
 
 		"""
 
-		irr = ['NA']
-		cash_flows = []
-		cash_stream = [self._get_year_zero_cash_flow()]
+		years, value, debt, equity, calculated_values, total, cash_stream, _ = \
+			self._get_yearly_schedules()
+
+		if irr_rates is None:
+			irr_rates = _get_irr_rates(*self.get_irr_cash_streams())
+		irr = self.get_irr_percents(irr_rates)
 
 		# Append year 0 values
-		cash_flow_dict = {
+		cash_flows = [{
 			'year': 'Purchase',
 			'equity': self._convert_to_round_integer(self.mortgage.down_payment_amount),
 			'debt': self._convert_to_round_integer(self.mortgage.mortgage_amount * -1),
@@ -119,74 +315,118 @@ class Investment:
 			'other_costs': 0,
 			'saved_rent': 0,
 			'irr': irr[0]
-		}
-		cash_flows.append(cash_flow_dict)
-
-		# Append year 1-30 values
-		current_value = self.house.price
-		debt = Decimal(self.mortgage.mortgage_amount * -1)
-		alternative_rent = self.alternative_rent
-
-		for year in range(1,31):
-			# Balance sheet calculation
-			principal_payment = self.mortgage.get_principal_payment(year)
-			debt = debt - principal_payment
-			current_value = self.house.get_future_value(year)
-			equity = current_value + debt
-
-			# Start cash flow dict with known balance sheet data
-			cash_flow_dict = {
-				'year': year,
-				'equity': self._convert_to_round_integer(equity),
-				'debt': self._convert_to_round_integer(debt),
-				'value': self._convert_to_round_integer(current_value),
-				'principal_payment': self._convert_to_round_integer(principal_payment)
-			}
-
-			# Update cash_flow_dict with calculated values
-			cash_flow_dict.update(self.get_calculated_values(year, debt))
-
-			# Calculate IRRs, which is based on yearly cash flows to date plus the
-			# cash generated if you were to sell
-			cash_stream.append(cash_flow_dict['total'])
-			sell_in_this_year_irr = self._get_irr(cash_stream, equity, debt, year)
-			cash_flow_dict['irr'] = sell_in_this_year_irr
-
-			# IRR values held in the cash_flows dict and as a separate array to
-			# simplify front-end parsing
-			irr.append(sell_in_this_year_irr)
-			cash_flows.append(cash_flow_dict)
+		}]
+
+		# Append year 1-30 values, converting each schedule to ints in one go.
+		# IRR values held in the cash_flows dict and as a separate array to
+		# simplify front-end parsing
+		yearly_values = zip(
+			years[1:].tolist(),
+			self._convert_to_round_integers(equity[1:]),
+			self._convert_to_round_integers(debt[1:]),
+			self._convert_to_round_integers(value[1:]),
+			self._convert_to_round_integers(self.mortgage.principal_schedule),
+			self._convert_to_round_integers(total),
+			self._convert_to_round_integers(calculated_values['other_costs']),
+			self._convert_to_round_integers(calculated_values['interest_payment']),
+			self._convert_to_round_integers(calculated_values['saved_rent']),
+			irr[1:]
+		)
+		keys = ('year', 'equity', 'debt', 'value', 'principal_payment', 'total',
+			'other_costs', 'interest_payment', 'saved_rent', 'irr')
+		cash_flows.extend(dict(zip(keys, values)) for values in yearly_values)
 
 		return irr, cash_flows
 
-	def get_calculated_values(self, year, debt):
-		"""Return single year dict of additional calculated values.
+	def get_irr_cash_streams(self):
+		"""Return cash streams whose IRRs are the IRRs of years 1-30.
+
+		IRRs are based on yearly cash flows to date plus the cash generated if
+		you were to sell, with each year's stream padded with zeros to the same
+		length so many years and investments can be solved in one batch.
 
 		Returns:
-			dict (string:int): Dictionary representing a given year of the investment
-				total (int): Net cash flow.
-				other_costs (int): Cost of maintenance, insurance, and pmi,
+			tuple (ndarray, ndarray): 2D array with the cash stream of each of
+				years 1-30 per row, and the number of cash flows in each row.
+
+		"""
+
+		years, _, _, _, _, _, cash_stream, net_sale_proceeds = self._get_yearly_schedules()
+
+		# Row for each year keeps the cash flows up to that year
+		cash_streams = numpy.tril(numpy.broadcast_to(cash_stream, (years.shape[0] - 1, years.shape[0])), 1)
+		cash_streams[years[:-1], years[1:]] += net_sale_proceeds[1:]
+
+		return cash_streams, years[1:] + 1
+
+	@staticmethod
+	def get_irr_percents(irr_rates):
+		"""Return IRRs as rounded percentages, preceded by 'NA' for year 0.
+
+		Args:
+			irr_rates (ndarray): IRRs for years 1-30 as decimal rates.
+
+		Returns:
+			array (string/float): 'NA' for year 0 and IRR as float for each of
+				years 1-30, or None when cash flows are always negative.
+
+		"""
+		return ['NA'] + [None if numpy.isnan(rate) else round(rate * 100, 2) for rate in irr_rates.tolist()]
+
+	def _get_yearly_schedules(self):
+		# Schedules only depend on the investment's values, so are computed once
+		# for both its IRRs and cash flows
+		if self._yearly_schedules is None:
+
+			# Balance sheet schedules for years 0-30
+			years = numpy.arange(self.mortgage.term_in_years + 1)
+			value = self.house.get_future_value(years)
+			debt = self.mortgage.debt_schedule
+			equity = value + debt
+
+			calculated_values = self.get_calculated_values(value, debt)
+			total = numpy.rint(calculated_values['total'])
+
+			cash_stream = numpy.concatenate(([self._get_year_zero_cash_flow()], total))
+			net_sale_proceeds = self._get_sale_proceeds(debt, equity)
+
+			self._yearly_schedules = (years, value, debt, equity, calculated_values,
+				total, cash_stream, net_sale_proceeds)
+
+		return self._yearly_schedules
+
+	def get_calculated_values(self, value, debt):
+		"""Return dict of additional calculated values for years 1-30.
+
+		Args:
+			value (ndarray): Value of the asset for years 0-30.
+			debt (ndarray): Mortgage debt balance for years 0-30.
+
+		Returns:
+			dict (string:ndarray): Dictionary of yearly schedules
+				total (ndarray): Net cash flow.
+				other_costs (ndarray): Cost of maintenance, insurance, and pmi,
 					net of the tax shield
-				interest_payment (int): Interest payment.
-				saved_rent (int): Rent not paid in year.
+				interest_payment (ndarray): Interest payment.
+				saved_rent (ndarray): Rent not paid in year.
 
 		"""
 
 		# Calculates in-year costs based on average value throughout year
-		average_value = (self.house.get_future_value(year) +
-			self.house.get_future_value(year-1)) / 2
+		average_value = (value[1:] + value[:-1]) / 2
 		maintenance = self.house.yearly_maintenance_rate * average_value * -1
-		property_tax = Decimal(self.house.yearly_property_tax_rate * average_value * -1)
+		property_tax = self.house.yearly_property_tax_rate * average_value * -1
 		insurance = self.house.yearly_insurance_rate * average_value * -1
-		rent_avoided = (self._get_future_rent(year) + self._get_future_rent(year-1)) / 2
+		rent = self._get_future_rent(numpy.arange(value.shape[0]))
+		rent_avoided = (rent[1:] + rent[:-1]) / 2
 
-		# Calculates tax benefits
-		interest_payment = self.mortgage.get_interest_payment(year)
-		interest_writeoff = self._get_interest_tax_benefit(debt, interest_payment)
+		# Calculates tax benefits based on the debt after each year's payment
+		interest_payment = self.mortgage.interest_schedule
+		interest_writeoff = self._get_interest_tax_benefit(debt[1:], interest_payment)
 		property_tax_writeoff = self._get_property_tax_benefit(property_tax)
 		tax_shield = interest_writeoff + property_tax_writeoff
 
-		pmi = self.mortgage.get_pmi_payment(debt)
+		pmi = self.mortgage.get_pmi_payment(debt[1:])
 
 		# Calculate cash stream
 		cash_flow = self.mortgage.yearly_payment + maintenance + property_tax + \
@@ -194,28 +434,10 @@ class Investment:
 
 		other_costs = cash_flow - rent_avoided - self.mortgage.yearly_payment
 		other_values_dict = {
-			'total': self._convert_to_round_integer(cash_flow),
-			'other_costs': self._convert_to_round_integer(other_costs),
-			'interest_payment': self._convert_to_round_integer(interest_payment),
-			'saved_rent': self._convert_to_round_integer(rent_avoided),
+			'total': cash_flow,
+			'other_costs': other_costs,
+			'interest_payment': interest_payment,
+			'saved_rent': rent_avoided,
 		}
 
 		return other_values_dict
-
-	def _get_irr(self, cash_stream, equity, debt, year):
-
-		# Copy cumulative cash_stream
-		cash_stream_with_sale = cash_stream[:]
-
-		# Add in incremental cash flow from a sale
-		net_sale_proceeds = self._get_sale_proceeds(debt, equity)
-		cash_stream_with_sale[year] = cash_stream[year] + net_sale_proceeds
-
-		# Sets cumulative to None for when cash flows are always negative
-		irr = npf.irr(cash_stream_with_sale)
-		if math.isnan(irr):
-			irr = None
-		else:
-			irr = round(irr * 100,2)
-
-		return irr
@@ -1,16 +1,20 @@
 import numpy_financial as npf
 import numpy
-from decimal import Decimal
-import math
 
 class Mortgage:
 	"""Respresentation of the investment's mortgage.
 
 	Attributes:
 		house (House): House object for the mortgage.
-		yearly_interest_rate (Decimal): Yearly mortgage interest rate.
+		yearly_interest_rate (float): Yearly mortgage interest rate.
 		term_in_years (int): Years for mortgage amortization.
-		down_payment_percent (Decimal): Down payment as a % of the house price.
+		down_payment_percent (float): Down payment as a % of the house price.
+		debt_schedule (ndarray): Mortgage debt balance at the end of each of
+			years 0-term_in_years, negative like the other mortgage values.
+		principal_schedule (ndarray): Principal payment in each of years
+			1-term_in_years.
+		interest_schedule (ndarray): Interest payment in each of years
+			1-term_in_years.
 
 	"""
 
@@ -22,18 +26,48 @@ class Mortgage:
 		self.mortgage_amount = self.house.price - self.down_payment_amount
 		self.monthly_payment = self._get_monthly_payment()
 		self.yearly_payment = self._get_yearly_payment()
+		self.debt_schedule, self.principal_schedule, self.interest_schedule = \
+			self._get_amortization_schedules()
+
+	def _get_payment(self, rate, periods):
+		mortgage_amount = self.mortgage_amount
+
+		# Closed form of the annuity payment, negative as a cash outflow
+		if rate == 0:
+			return mortgage_amount / periods * -1
+
+		growth = (1 + rate) ** periods
+		return mortgage_amount * rate * growth / (growth - 1) * -1
 
 	def _get_monthly_payment(self):
 		monthly_rate = self.yearly_interest_rate / 12
 		months = self.term_in_years * 12
-		mortgage_amount = self.mortgage_amount
-		return npf.pmt(monthly_rate, months, mortgage_amount)
+		return self._get_payment(monthly_rate, months)
 
 	def _get_yearly_payment(self):
+		yearly_rate = self.yearly_interest_rate
+		years = self.term_in_years
+		return self._get_payment(yearly_rate, years)
+
+	def _get_amortization_schedules(self):
 		yearly_rate = self.yearly_interest_rate
 		years = self.term_in_years
 		mortgage_amount = self.mortgage_amount
-		return Decimal(npf.pmt(yearly_rate, years, mortgage_amount))
+
+		# Closed form of the remaining balance after each year's payment
+		elapsed_years = numpy.arange(years + 1)
+		if yearly_rate == 0:
+			balance = mortgage_amount * (years - elapsed_years) / years
+		else:
+			growth = (1 + yearly_rate) ** elapsed_years
+			total_growth = (1 + yearly_rate) ** years
+			balance = mortgage_amount * (total_growth - growth) / (total_growth - 1)
+
+		debt = balance * -1
+		principal_payments = balance[1:] - balance[:-1]
+		interest_payments = balance[:-1] * yearly_rate * -1
+
+		return debt, principal_payments, interest_payments
 
 	def get_principal_payment(self, year):
 		"""Return principal payment for a given year post-investment.
@@ -42,14 +76,14 @@ class Mortgage:
 			year (int): Number of years after the purchase of the asset.
 
 		Returns:
-			Decimal: Principal payment in given year.
+			float: Principal payment in given year.
 
 		"""
 
 		yearly_rate = self.yearly_interest_rate
 		years = self.term_in_years
 		mortgage_amount = self.mortgage_amount
-		return Decimal(npf.ppmt(yearly_rate, year, years, mortgage_amount))
+		return float(npf.ppmt(yearly_rate, year, years, mortgage_amount))
 
 	def get_interest_payment(self, year):
 		"""Return principal payment for a given year post-investment.
@@ -58,33 +92,28 @@ class Mortgage:
 			year (int): Number of years after the purchase of the asset.
 
 		Returns:
-			Decimal: Interest payment in given year.
+			float: Interest payment in given year.
 
 		"""
 		yearly_rate = self.yearly_interest_rate
 		years = self.term_in_years
 		mortgage_amount = self.mortgage_amount
-		ipmt = npf.ipmt(yearly_rate, year, years, mortgage_amount)
-
-		# asscalar needed to enable conversion of the ndarray to Decimal values
-		return Decimal(numpy.asscalar(ipmt))
+		return float(npf.ipmt(yearly_rate, year, years, mortgage_amount))
 
 	def get_pmi_payment(self, debt):
 		"""Return pmi payment for a given year post-investment.
 
 		Args:
-			debt (Decimal): Mortgage debt balance
+			debt (float/ndarray): Mortgage debt balance, or an array of them.
 
 		Returns:
-			Decimal: Cost of PMI insurance.
+			float/ndarray: Cost of PMI insurance.
 
 		"""
 
-		PMI_INSURANCE = Decimal(.01)
-		pmi = 0
+		PMI_INSURANCE = .01
 
 		# Debt is a negative value, hence the < -.8
-		if debt / self.house.price < -.8:
-			pmi = debt * PMI_INSURANCE
+		has_pmi = debt / self.house.price < -.8
 
-		return pmi
+		return debt * PMI_INSURANCE * has_pmi
@@ -1,5 +1,6 @@
 from django.test import TestCase
-from calc.forms import InvestmentForm
+from calc.forms import InvestmentForm, parse_investment_data
+from django.http import QueryDict
 
 class InvestmentFormTest(TestCase):
 	
@@ -21,4 +22,24 @@ class InvestmentFormTest(TestCase):
 		}
 		
 		form = InvestmentForm(data=form_data)
-		self.assertTrue(form.is_valid())
\ No newline at end of file
+		self.assertTrue(form.is_valid())
+		
+	def test_parse_investment_data_returns_rates_with_valid_data(self):
+		
+		data = QueryDict('closing_cost=3.0&maintenance_cost=1.0&property_tax=2.0&down_payment=20.0&interest_rate=5.0&yearly_appreciation=5.0&realtor_cost=6.0&federal_tax_bracket=.32&state_tax_bracket=6.0&insurance=1.0&price=500000&alternative_rent=1500')
+		
+		cleaned_data, errors = parse_investment_data(data)
+		
+		self.assertEqual(errors, {})
+		self.assertEqual(cleaned_data['price'], 500000)
+		self.assertEqual(cleaned_data['alternative_rent'], 1500)
+		self.assertEqual(cleaned_data['down_payment'], .2)
+		self.assertEqual(cleaned_data['federal_tax_bracket'], .32)
+		
+	def test_parse_investment_data_returns_errors_with_invalid_data(self):
+		
+		data = QueryDict('closing_cost=300&maintenance_cost=cake&property_tax=2.0&down_payment=20.0&interest_rate=5.0&yearly_appreciation=5.0&realtor_cost=6.0&federal_tax_bracket=.5&state_tax_bracket=6.0&insurance=1.0&price=500000&alternative_rent=-1')
+		
+		_, errors = parse_investment_data(data)
+		
+		self.assertEqual(set(errors), {'closing_cost', 'maintenance_cost', 'federal_tax_bracket', 'alternative_rent'})
@@ -1,28 +1,28 @@
 from django.test import TestCase
 from calc.house import House
 from calc.mortgage import Mortgage
-from calc.investment import Investment
-from decimal import Decimal
+from calc.investment import Investment, _get_irr_rate, _get_irr_rates, _irr_newton, get_yearly_irr_rates
+import numpy
 		
 class InvestmentTestCase(TestCase):
 
 	# House variables
 	price = 500000
-	yearly_property_tax_rate = Decimal(.02)
-	yearly_appreciation_rate = Decimal(.05)
-	yearly_maintenance_as_percent_of_value = Decimal(.01)
-	yearly_insurance_as_percent_of_value = Decimal(.01)
+	yearly_property_tax_rate = .02
+	yearly_appreciation_rate = .05
+	yearly_maintenance_as_percent_of_value = .01
+	yearly_insurance_as_percent_of_value = .01
 	
 	# Mortgage variables
-	yearly_interest_rate = Decimal(.05)
+	yearly_interest_rate = .05
 	term_in_years = 30
-	down_payment_percent = Decimal(.2)
+	down_payment_percent = .2
 	
 	# Investment variables
-	realtor_cost_as_percent_of_value = Decimal(.06)
-	federal_tax_rate = Decimal(.32)
-	state_tax_rate = Decimal(.06)
-	closing_cost_as_percent_of_value = Decimal(.03)
+	realtor_cost_as_percent_of_value = .06
+	federal_tax_rate = .32
+	state_tax_rate = .06
+	closing_cost_as_percent_of_value = .03
 	alternative_rent = 1500 * 12
 	
 	# Output based on values generated from this Google Sheet
@@ -83,7 +83,7 @@ class InvestmentTestCase(TestCase):
 		
 		investment = self._create_investment()
 		
-		DEBT_VALUE = Decimal(-1000000)
+		DEBT_VALUE = -1000000
 		DEBT_LIMIT = 750000
 		INTEREST_PAYMENT = 1000
 		
@@ -161,7 +161,7 @@ class InvestmentTestCase(TestCase):
 	def test_get_yearly_cash_flows_and_irr_returns_NA_IRRs(self):
 		
 		house = self._create_house()
-		mortgage = Mortgage(house, self.yearly_interest_rate, self.term_in_years, Decimal(.01))
+		mortgage = Mortgage(house, self.yearly_interest_rate, self.term_in_years, .01)
 		investment = Investment(house, mortgage, self.closing_cost_as_percent_of_value, self.alternative_rent, self.realtor_cost_as_percent_of_value, self.federal_tax_rate, self.state_tax_rate)
 		
 		irr, _ = investment.get_yearly_cash_flows_and_irr()
@@ -175,4 +175,64 @@ class InvestmentTestCase(TestCase):
 		round_integer = Investment._convert_to_round_integer(NUMBER)
 
 		self.assertEqual(round_integer, 2157)
-		
\ No newline at end of file
+		
+	def test_irr_newton_returns_rate_with_zero_npv(self):
+		
+		cash_stream = numpy.array([-100000, -5000, 20000, 140000], dtype=numpy.float64)
+		
+		irr = _irr_newton(cash_stream, .1)
+		npv = sum(cash_stream[year] / (1 + irr) ** year for year in range(len(cash_stream)))
+		
+		self.assertAlmostEqual(npv, 0, places=4)
+		self.assertAlmostEqual(_irr_newton(numpy.array([-100.0, 110.0]), .1), .1)
+		
+	def test_irr_newton_returns_nan_without_positive_cash_flows(self):
+		
+		cash_stream = numpy.array([-20000, -5000], dtype=numpy.float64)
+		
+		self.assertTrue(numpy.isnan(_irr_newton(cash_stream, .1)))
+		
+	def test_get_irr_rate_falls_back_to_brent_if_newton_diverges(self):
+		
+		cash_stream = numpy.array([-732, 1970, -1877, 203], dtype=numpy.float64)
+		
+		irr = _get_irr_rate(cash_stream)
+		npv = sum(cash_stream[year] / (1 + irr) ** year for year in range(len(cash_stream)))
+		
+		self.assertTrue(numpy.isnan(_irr_newton(cash_stream, .1)))
+		self.assertAlmostEqual(npv, 0, places=6)
+		
+	def test_get_irr_rate_returns_nan_without_sign_change(self):
+		
+		cash_stream = numpy.array([-20000, -5000, -1000], dtype=numpy.float64)
+		
+		self.assertTrue(numpy.isnan(_get_irr_rate(cash_stream)))
+		
+	def test_get_irr_rates_matches_unpadded_rates_and_falls_back_to_brent(self):
+		
+		cash_streams = numpy.array([
+			[-100000, -5000, 20000, 140000],
+			[-732, 1970, -1877, 203],
+			[-100, 110, 0, 0],
+			[-20000, -5000, 0, 0],
+		], dtype=numpy.float64)
+		lengths = numpy.array([4, 4, 2, 2])
+		
+		irr_rates = _get_irr_rates(cash_streams, lengths)
+		
+		self.assertEqual(irr_rates[0], _get_irr_rate(cash_streams[0]))
+		self.assertEqual(irr_rates[1], _get_irr_rate(cash_streams[1]))
+		self.assertAlmostEqual(irr_rates[2], .1)
+		self.assertTrue(numpy.isnan(irr_rates[3]))
+		
+	def test_get_yearly_irr_rates_matches_each_investments_irr(self):
+		
+		investment = self._create_investment()
+		house = self._create_house()
+		mortgage = Mortgage(house, self.yearly_interest_rate, self.term_in_years, .01)
+		low_down_payment_investment = Investment(house, mortgage, self.closing_cost_as_percent_of_value, self.alternative_rent, self.realtor_cost_as_percent_of_value, self.federal_tax_rate, self.state_tax_rate)
+		
+		irr_rates = get_yearly_irr_rates([investment, low_down_payment_investment])
+		
+		self.assertEqual(Investment.get_irr_percents(irr_rates[0]), investment.get_yearly_cash_flows_and_irr()[0])
+		self.assertEqual(Investment.get_irr_percents(irr_rates[1]), low_down_payment_investment.get_yearly_cash_flows_and_irr()[0])
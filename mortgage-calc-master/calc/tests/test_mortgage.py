@@ -1,7 +1,6 @@
 from django.test import TestCase
 from calc.house import House
 from calc.mortgage import Mortgage
-from decimal import Decimal
 
 class MortgageTestCase(TestCase):
 
@@ -59,6 +58,19 @@ class MortgageTestCase(TestCase):
 		
 		self.assertEqual(round(mortgage._get_yearly_payment()), -26021)
 		
+	def test_monthly_payment_returns_2147_with_interest(self):
+	
+		mortgage = self._create_mortgage()
+		
+		self.assertEqual(round(mortgage.monthly_payment), -2147)
+		
+	def test_monthly_payment_splits_mortgage_evenly_if_rate_is_0(self):
+	
+		house = self._create_house()
+		mortgage = Mortgage(house, 0, self.term_in_years, self.down_payment_percent)
+		
+		self.assertEqual(mortgage.monthly_payment, mortgage.mortgage_amount / (self.term_in_years * 12) * -1)
+		
 	def test_get_principal_payment_returns_correct_amounts(self):
 		
 		mortgage = self._create_mortgage()
@@ -96,6 +108,6 @@ class MortgageTestCase(TestCase):
 		mortgage = self._create_mortgage()
 		debt = -.9 * self.price
 		
-		self.assertEqual(round(mortgage.get_pmi_payment(Decimal(debt))), round(.01 * debt))
+		self.assertEqual(round(mortgage.get_pmi_payment(debt)), round(.01 * debt))
 		
 		
\ No newline at end of file
@@ -2,8 +2,26 @@ from django.test import RequestFactory, TestCase
 from calc.house import House
 from calc.mortgage import Mortgage
 from calc.investment import Investment
-from calc.views import AboutView, IndexView, InvestmentView
+from calc.views import AboutView, IndexView, InvestmentView, NO_LEVERAGE, NO_TAX_SHIELD, json_response
 import json
+import numpy
+
+class JsonResponseTest(TestCase):
+	
+	def test_json_response_returns_compact_json_with_status(self):
+		
+		response = json_response({'irr': ['NA', 1.5, None]}, status=400)
+		
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(response['Content-Type'], 'application/json')
+		self.assertEqual(response.content, b'{"irr":["NA",1.5,null]}')
+		
+	def test_json_response_serializes_arrays_with_nan_as_null(self):
+		
+		response = json_response({'irr_delta': numpy.array([1.5, numpy.nan])})
+		
+		self.assertEqual(response.content, b'{"irr_delta":[1.5,null]}')
+		
 
 class AboutViewTest(TestCase):
 	def setUp(self):
@@ -105,23 +123,49 @@ class InvestmentViewTest(TestCase):
 		self.assertEqual(response_dict['expenses_driver_irr'][29], -8.15)
 		self.assertEqual(response_dict['expenses_driver_irr'][1], -22.71)
 		
+	def test_view_caches_response_of_repeated_parameters(self):
+		
+		get_parameters = {
+			'closing_cost': 2.0,
+			'maintenance_cost': 1.5,
+			'property_tax': 1.0,
+			'down_payment': 10.0,
+			'interest_rate': 4.0,
+			'yearly_appreciation': 3.0,
+			'realtor_cost': 5.0,
+			'federal_tax_bracket': '.24',
+			'state_tax_bracket': 5.0,
+			'insurance': .5,
+			'price': 300000,
+			'alternative_rent': 1200,
+		}
+		
+		InvestmentView._get_response_content.cache_clear()
+		first_response = InvestmentView.as_view()(self.factory.get('/stream', get_parameters))
+		second_response = InvestmentView.as_view()(self.factory.get('/stream', get_parameters))
+		
+		self.assertEqual(second_response.status_code, 200)
+		self.assertEqual(second_response.content, first_response.content)
+		self.assertEqual(InvestmentView._get_response_content.cache_info().hits, 1)
+		
 	def test_get_IRR_delta_returns_difference_and_skips_first_entry(self):
 		
 		BASE_IRR = [1, 2, 3, 4, 5]
 		ALTERNATIVE_IRR = [2, 3, 4, 5, 6]
 		
-		delta = InvestmentView._get_irr_delta(BASE_IRR, ALTERNATIVE_IRR)
+		delta = InvestmentView._get_irr_delta(InvestmentView._get_irr_array(BASE_IRR), ALTERNATIVE_IRR)
 		
-		self.assertEqual(delta, [-1, -1, -1, -1])
+		self.assertEqual(delta.tolist(), [-1, -1, -1, -1])
 		
 	def test_get_IRR_delta_returns_difference_and_skips_first_entry_with_nulls(self):
 		
 		BASE_IRR = [1, 'cake', 3, 4, 5]
 		ALTERNATIVE_IRR = [2, 'frosting', 4, 5, 6]
 		
-		delta = InvestmentView._get_irr_delta(BASE_IRR, ALTERNATIVE_IRR)
+		delta = InvestmentView._get_irr_delta(InvestmentView._get_irr_array(BASE_IRR), ALTERNATIVE_IRR)
 		
-		self.assertEqual(delta, [None, -1, -1, -1])
+		self.assertTrue(numpy.isnan(delta[0]))
+		self.assertEqual(delta[1:].tolist(), [-1, -1, -1])
 		
 	def test_get_unified_scenario_returns_combined_dictionary(self):
 		
@@ -177,3 +221,33 @@ class InvestmentViewTest(TestCase):
 		
 
 		
+		
+	def test_get_scenario_builder_shares_house_and_mortgage_and_reuses_identical_scenarios(self):
+		
+		scenario = {
+			'price': 500000,
+			'yearly_appreciation_rate': .05,
+			'yearly_property_tax_rate': .01,
+			'yearly_maintenance_as_percent_of_value': .01,
+			'insurance': .02,
+			'yearly_interest_rate': .05,
+			'down_payment_percent': .2,
+			'closing_cost_as_percent_of_value': .03,
+			'alternative_rent': 1500,
+			'realtor_cost': .06,
+			'federal_tax_rate': .32,
+			'state_tax_rate': .06		
+		}
+		no_leverage = InvestmentView._get_unified_scenario(scenario, NO_LEVERAGE)
+		no_tax_shield = InvestmentView._get_unified_scenario(scenario, NO_TAX_SHIELD)
+		
+		build_scenario = InvestmentView._get_scenario_builder(scenario)
+		investment = build_scenario(scenario)
+		same_investment = build_scenario(dict(scenario))
+		no_leverage_investment = build_scenario(no_leverage)
+		no_tax_shield_investment = build_scenario(no_tax_shield)
+		
+		self.assertIs(investment, same_investment)
+		self.assertIs(investment.house, no_tax_shield_investment.house)
+		self.assertIs(investment.mortgage, no_tax_shield_investment.mortgage)
+		self.assertIsNot(investment.mortgage, no_leverage_investment.mortgage)
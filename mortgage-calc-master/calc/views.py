@@ -1,14 +1,115 @@
 from django.shortcuts import render
 from django.views import View
-from django.http import HttpResponse, JsonResponse
-from calc.forms import InvestmentForm
+from django.http import HttpResponse
+from calc.forms import InvestmentForm, parse_investment_data
 from calc.house import House
 from calc.mortgage import Mortgage
-from calc.investment import Investment
-from decimal import Decimal
-import copy
+from calc.investment import Investment, get_yearly_irr_rates
+import functools
+import json
+import numpy
+from types import MappingProxyType
 from django.conf import settings
 
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+# Modified values of each driver scenario, read-only as they're shared by
+# all requests
+NO_LEVERAGE = MappingProxyType({
+	'yearly_interest_rate': 0,
+	'down_payment_percent': 1,
+})
+
+NO_ALTERNATIVE_RENT = MappingProxyType({
+	'alternative_rent': 0,
+})
+
+NO_TAX_SHIELD = MappingProxyType({
+	'state_tax_rate': 0,
+	'federal_tax_rate': 0,
+})
+
+NO_APPRECIATION = MappingProxyType({
+	'yearly_appreciation_rate': 0,
+})
+
+NO_EXPENSES = MappingProxyType({
+	'yearly_property_tax_rate': 0,
+	'yearly_maintenance_as_percent_of_value': 0,
+	'insurance': 0,
+	'closing_cost_as_percent_of_value': 0,
+})
+
+# Result name and modified values of each driver scenario
+DRIVER_SCENARIOS = (
+	('mortgage_driver_irr', NO_LEVERAGE),
+	('alternative_rent_driver_irr', NO_ALTERNATIVE_RENT),
+	('tax_shield_driver_irr', NO_TAX_SHIELD),
+	('appreciation_driver_irr', NO_APPRECIATION),
+	('expenses_driver_irr', NO_EXPENSES),
+)
+
+# Scenario values which determine the House and Mortgage
+HOUSE_AND_MORTGAGE_KEYS = frozenset((
+	'price',
+	'yearly_appreciation_rate',
+	'yearly_property_tax_rate',
+	'yearly_maintenance_as_percent_of_value',
+	'insurance',
+	'yearly_interest_rate',
+	'down_payment_percent',
+))
+
+# Change in appreciation rate for the high and low appreciation scenarios
+APPRECIATION_DELTA = .01
+
+# GET parameters used to pre-fill the form, with the type to cast each to
+INDEX_PARAMETERS = (
+	('price', int),
+	('alternative_rent', int),
+	('closing_cost', float),
+	('maintenance_cost', float),
+	('property_tax', float),
+	('down_payment', float),
+	('interest_rate', float),
+	('yearly_appreciation', float),
+	('realtor_cost', float),
+	('federal_tax_bracket', float),
+	('state_tax_bracket', float),
+	('insurance', float),
+)
+
+def _to_json_list(obj):
+	# Converts arrays for the json fallback, with nan as null like orjson
+	if isinstance(obj, numpy.ndarray):
+		return [None if value != value else value for value in obj.tolist()]
+	
+	raise TypeError('Object of type %s is not JSON serializable' % type(obj).__name__)
+
+
+def dumps_json(data):
+	"""Return compact JSON of data, serialized with orjson if installed.
+	
+	NumPy arrays are serialized directly as lists, with nan as null.
+	
+	"""
+	if orjson is not None:
+		return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+	
+	return json.dumps(data, separators=(',', ':'), default=_to_json_list)
+
+
+def json_response(content, status=200):
+	"""Return HttpResponse of JSON content, serializing it if not already."""
+	if not isinstance(content, (bytes, str)):
+		content = dumps_json(content)
+	
+	return HttpResponse(content, content_type='application/json', status=status)
+
+
 class AboutView(View):
 	"""Return About and Methodology page."""
 	
@@ -36,25 +137,15 @@ class IndexView(View):
 		
 		"""
 			
-		float_parameters = ['closing_cost', 'maintenance_cost', 'property_tax', 'down_payment', 'interest_rate', 'yearly_appreciation', 'realtor_cost', 'federal_tax_bracket', 'state_tax_bracket', 'insurance']
-		
 		context_dict = {}
 		
 		# Collects GET parameters from URL to add to pre-fill form fields
-		for parameter in float_parameters:
-			if parameter in request.GET:
-				try:
-					context_dict[parameter] = float(request.GET[parameter])
-				except:
-					pass
-				
-		int_parameters = ['price', 'alternative_rent']
-		
-		for parameter in int_parameters:
-			if parameter in request.GET:
+		for parameter, cast in INDEX_PARAMETERS:
+			value = request.GET.get(parameter)
+			if value is not None:
 				try:
-					context_dict[parameter] = int(request.GET[parameter])
-				except:
+					context_dict[parameter] = cast(value)
+				except ValueError:
 					pass
 		
 		return render(request, self.template_name, context_dict)
@@ -63,44 +154,21 @@ class IndexView(View):
 class InvestmentView(View): 
 	"""Endpoint returning dict of cash flows and IRRs."""
 	
-	# Dicts for modified values of each scenario
-	no_leverage = {
-		'yearly_interest_rate': 0,
-		'down_payment_percent': 1,
-		'name': 'mortgage_driver_irr'
-	}
-
-	no_alternative_rent = {
-		'alternative_rent': 0,
-		'name': 'alternative_rent_driver_irr'
-	}
-
-	no_tax_shield = {
-		'state_tax_rate': 0,
-		'federal_tax_rate': 0,
-		'name': 'tax_shield_driver_irr'
-	}
-
-	no_appreciation = {
-		'yearly_appreciation_rate': 0,
-		'name': 'appreciation_driver_irr'
-	}
-
-	no_expenses = {
-		'yearly_property_tax_rate': 0,
-		'yearly_maintenance_as_percent_of_value': 0, 
-		'insurance': 0,
-		'closing_cost_as_percent_of_value': 0,
-		'name': 'expenses_driver_irr'
-	}
-
-	other_scenarios = [
-		no_leverage,
-		no_alternative_rent,
-		no_tax_shield,
-		no_appreciation,
-		no_expenses
-	]
+	# Keys which fully determine the outcome of a scenario
+	scenario_keys = (
+		'price',
+		'yearly_appreciation_rate',
+		'yearly_property_tax_rate',
+		'yearly_maintenance_as_percent_of_value',
+		'insurance',
+		'yearly_interest_rate',
+		'down_payment_percent',
+		'closing_cost_as_percent_of_value',
+		'alternative_rent',
+		'realtor_cost',
+		'federal_tax_rate',
+		'state_tax_rate',
+	)
 	
 	@staticmethod
 	def _build_investment(scenario):
@@ -120,6 +188,11 @@ class InvestmentView(View):
 			scenario['down_payment_percent']
 		)	
 		
+		return InvestmentView._build_investment_with_shared(house, mortgage, scenario)
+	
+	@staticmethod
+	def _build_investment_with_shared(house, mortgage, scenario):
+		
 		investment = Investment(
 			house, 
 			mortgage, 
@@ -132,25 +205,59 @@ class InvestmentView(View):
 		
 		return investment
 	
+	@classmethod
+	def _get_scenario_builder(cls, base_scenario):
+		"""Return function building a scenario's Investment, memoized for a single request.
+		
+		Scenarios with the same house and mortgage values as the base scenario 
+		share its House and Mortgage, along with their schedules, and scenarios 
+		with identical values share an Investment. A new builder is created for 
+		every request so nothing is cached across users.
+		
+		Args:
+			base_scenario (dict): Scenario whose House and Mortgage are shared.
+		
+		Returns:
+			function: Takes a scenario dict and returns its Investment.
+		
+		"""
+		
+		base_investment = cls._build_investment(base_scenario)
+		
+		@functools.lru_cache(maxsize=None)
+		def build_scenario_values(scenario_values):
+			scenario = dict(zip(cls.scenario_keys, scenario_values))
+			
+			if all(scenario[key] == base_scenario[key] for key in HOUSE_AND_MORTGAGE_KEYS):
+				return cls._build_investment_with_shared(
+					base_investment.house, base_investment.mortgage, scenario)
+			
+			return cls._build_investment(scenario)
+		
+		def build_scenario(scenario):
+			return build_scenario_values(tuple(scenario[key] for key in cls.scenario_keys))
+		
+		return build_scenario
+	
 	@staticmethod
 	def _get_unified_scenario(comprehensive_scenario, modified_scenario):
-		unified_scenario = copy.deepcopy(comprehensive_scenario)
-		unified_scenario.update(modified_scenario)
-			
-		return unified_scenario
+		# Scenario values are immutable numbers, so a shallow merge is enough
+		return {**comprehensive_scenario, **modified_scenario}
+
+	@staticmethod
+	def _get_irr_array(irr):
+		# Null IRRs, from years without positive cash flows, become nan
+		return numpy.array(
+			[value if isinstance(value, (int, float)) else numpy.nan for value in irr[1:]],
+			dtype=numpy.float64
+		)
 
 	@staticmethod
-	def _get_irr_delta(base_irr, alternative_irr):
-		irr_delta = []
-		for year in range(1, len(base_irr)):
-			# Handles case where one of the IRRs is null due to no positive cash flows
-			try:
-				delta =  base_irr[year] - alternative_irr[year]
-				irr_delta.append(round(delta,2))
-			except TypeError:
-				irr_delta.append(None)
+	def _get_irr_delta(base_irr_array, alternative_irr):
+		# Kept as an array for dumps_json, with null IRR deltas as nan
+		irr_delta = base_irr_array - InvestmentView._get_irr_array(alternative_irr)
 		
-		return irr_delta
+		return numpy.round(irr_delta, 2)
 		
 	
 	def get(self, request, *args, **kwargs):
@@ -161,66 +268,97 @@ class InvestmentView(View):
 				which are used to calculate return.
 			
 		Returns:
-			JsonResponse: Dict containing IRRs, cash stream, and base yearly 
+			HttpResponse: JSON dict containing IRRs, cash stream, and base yearly 
 				mortgage payment
 		
 		"""
 		
-		form = InvestmentForm(request.GET)
-		if form.is_valid():				
+		# Params as hashable (key, values) pairs to look up the cached response
+		params = tuple((key, tuple(values)) for key, values in sorted(request.GET.lists()))
+		content, status = self._get_response_content(params)
+		
+		return json_response(content, status=status)
+	
+	@classmethod
+	@functools.lru_cache(maxsize=1024)
+	def _get_response_content(cls, params):
+		"""Return JSON content and status of the response for the given params.
+		
+		The response only depends on the params, so it is cached across requests
+		to answer repeated requests, e.g. from the form being resubmitted, without
+		recalculating.
+		
+		Args:
+			params (tuple): GET params as (key, values) pairs.
+			
+		Returns:
+			tuple (bytes/str, int): JSON content and HTTP status code.
+		
+		"""
+		
+		# Like QueryDict, takes the last value of repeated params
+		cleaned_data, errors = parse_investment_data({key: values[-1] for key, values in params})
+		if not errors:
 			
 			standard_investment = {
-				'price': form.cleaned_data['price'],
-				'yearly_appreciation_rate': form.cleaned_data['yearly_appreciation'],
-				'yearly_property_tax_rate': form.cleaned_data['property_tax'],
-				'yearly_maintenance_as_percent_of_value': form.cleaned_data['maintenance_cost'],
-				'insurance': form.cleaned_data['insurance'],
-				'yearly_interest_rate': form.cleaned_data['interest_rate'],
-				'down_payment_percent': form.cleaned_data['down_payment'],
-				'closing_cost_as_percent_of_value': form.cleaned_data['closing_cost'],
-				'alternative_rent': form.cleaned_data['alternative_rent'] * 12,
-				'realtor_cost': form.cleaned_data['realtor_cost'],
-				'federal_tax_rate': form.cleaned_data['federal_tax_bracket'],
-				'state_tax_rate': form.cleaned_data['state_tax_bracket'],		
+				'price': cleaned_data['price'],
+				'yearly_appreciation_rate': cleaned_data['yearly_appreciation'],
+				'yearly_property_tax_rate': cleaned_data['property_tax'],
+				'yearly_maintenance_as_percent_of_value': cleaned_data['maintenance_cost'],
+				'insurance': cleaned_data['insurance'],
+				'yearly_interest_rate': cleaned_data['interest_rate'],
+				'down_payment_percent': cleaned_data['down_payment'],
+				'closing_cost_as_percent_of_value': cleaned_data['closing_cost'],
+				'alternative_rent': cleaned_data['alternative_rent'] * 12,
+				'realtor_cost': cleaned_data['realtor_cost'],
+				'federal_tax_rate': cleaned_data['federal_tax_bracket'],
+				'state_tax_rate': cleaned_data['state_tax_bracket'],		
 			}
 
+			build_scenario = cls._get_scenario_builder(standard_investment)
+			
+			appreciation_rate = standard_investment['yearly_appreciation_rate']
+			appreciation_scenarios = (
+				('high_irr', {'yearly_appreciation_rate': appreciation_rate + APPRECIATION_DELTA}),
+				('low_irr', {'yearly_appreciation_rate': appreciation_rate - APPRECIATION_DELTA}),
+			)
+			
+			investment = build_scenario(standard_investment)
+			scenario_investments = [
+				(name, build_scenario(cls._get_unified_scenario(standard_investment, scenario)))
+				for name, scenario in appreciation_scenarios + DRIVER_SCENARIOS
+			]
+			
+			# IRRs of every scenario are solved in one batch, with identical
+			# scenarios sharing an Investment only solved once
+			investments = list(dict.fromkeys(
+				[investment] + [scenario_investment for _, scenario_investment in scenario_investments]))
+			irr_rates = dict(zip(investments, get_yearly_irr_rates(investments)))
+			
 			# Base stream
-			investment = self._build_investment(standard_investment)
-			base_irr, cash_stream = investment.get_yearly_cash_flows_and_irr()
+			base_irr, cash_stream = investment.get_yearly_cash_flows_and_irr(irr_rates[investment])
 			mortgage_payment = int(round(investment.mortgage.monthly_payment))
 			context_dict = {
 				'base_irr': base_irr,
 				'cash_stream': cash_stream,
 				'mortgage_payment': mortgage_payment
 			}
-
-			high_appreciation = {
-				'yearly_appreciation_rate': standard_investment['yearly_appreciation_rate'] + Decimal(.01),
-			}
 			
-			low_appreciation = {
-				'yearly_appreciation_rate': standard_investment['yearly_appreciation_rate'] - Decimal(.01),
+			scenario_irrs = {
+				name: Investment.get_irr_percents(irr_rates[scenario_investment])
+				for name, scenario_investment in scenario_investments
 			}
 			
-			scenario = self._get_unified_scenario(standard_investment, high_appreciation)
-			investment = self._build_investment(scenario)
-			high_irr, _ = investment.get_yearly_cash_flows_and_irr()
-			context_dict['high_irr'] = high_irr
-			
-			scenario = self._get_unified_scenario(standard_investment, low_appreciation)
-			investment = self._build_investment(scenario)
-			low_irr, _ = investment.get_yearly_cash_flows_and_irr()
-			context_dict['low_irr'] = low_irr
+			for name, _ in appreciation_scenarios:
+				context_dict[name] = scenario_irrs[name]
 			
-			for scenario in self.other_scenarios:
-				unified_scenario = self._get_unified_scenario(standard_investment, scenario)
-				investment = self._build_investment(unified_scenario)
-				scenario_irr, _ = investment.get_yearly_cash_flows_and_irr()
-				irr_delta = self._get_irr_delta(base_irr, scenario_irr)
-				context_dict[scenario['name']] = irr_delta
+			# Base IRRs are shared by every driver delta, so convert them once
+			base_irr_array = cls._get_irr_array(base_irr)
+			for name, _ in DRIVER_SCENARIOS:
+				context_dict[name] = cls._get_irr_delta(base_irr_array, scenario_irrs[name])
 			
-			return JsonResponse(context_dict)
+			return dumps_json(context_dict), 200
 		else:
-			print(form.errors)
+			print(errors)
 		
-		return JsonResponse(form.errors, status=400)
\ No newline at end of file
+		return dumps_json(errors), 400
\ No newline at end of file